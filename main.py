@@ -3,20 +3,20 @@ AstrBot Server Status Plugin v4.0 - 企业级增强版
 工业级服务器状态监控插件，支持智能缓存、并行采集和健康检查
 """
 
+import array
 import asyncio
 import datetime
+import functools
 import logging
 import os
 import platform
 import psutil
+import re
 import time
 import math
-import statistics
 from enum import Enum, auto
-from typing import Dict, List, Optional, Set, Tuple, Union, Any, Deque
+from typing import Dict, List, Optional, Set, Tuple, Union, Any
 from dataclasses import dataclass, field
-from collections import deque
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from astrbot.api.star import Star, register, Context
 from astrbot.api.event import filter as event_filter, AstrMessageEvent
@@ -25,6 +25,11 @@ from astrbot.api import logger as astr_logger, AstrBotConfig
 # 配置插件日志
 logger = logging.getLogger(__name__)
 
+# 平台在进程生命周期内不变，避免热路径上重复调用 platform.system()
+_IS_WINDOWS = platform.system() == "Windows"
+# POSIX 上直接调用 statvfs，省去 psutil 的包装层；Windows 无此接口
+_HAS_STATVFS = hasattr(os, 'statvfs')
+
 # --- 枚举和常量定义 ---
 
 class CacheLevel(Enum):
@@ -39,9 +44,21 @@ class ErrorSeverity(Enum):
     ERROR = auto()      # 错误，需要重新采集
     CRITICAL = auto()   # 严重错误，停止服务
 
+class ErrorCategory(Enum):
+    """错误来源类别：供缓存级别判定使用，避免对消息文本做子串匹配"""
+    CPU = auto()
+    MEMORY = auto()
+    NETWORK = auto()
+    SYSTEM = auto()
+    DISK = auto()
+    GENERAL = auto()
+
+# 错误条目: (面向用户的消息, 严重级别, 来源类别)
+ErrorEntry = Tuple[str, ErrorSeverity, ErrorCategory]
+
 # --- 数据契约定义 ---
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class DiskUsage:
     """磁盘使用情况"""
     display_path: str
@@ -51,7 +68,7 @@ class DiskUsage:
     percent: float
     is_critical: bool = field(default=False)  # 是否关键磁盘
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SystemMetrics:
     """系统指标快照"""
     cpu_percent: Optional[float]
@@ -61,28 +78,37 @@ class SystemMetrics:
     mem_percent: Optional[float]
     net_sent: Optional[int]
     net_recv: Optional[int]
-    uptime: Optional[datetime.timedelta]
+    uptime: Optional[float]  # 运行时长（秒）
     is_container_uptime: bool
     disks: Optional[List[DiskUsage]]
     process_count: Optional[int] = field(default=None)  # 进程数量
     load_avg: Optional[float] = field(default=None)    # 系统负载
-    errors: List[Tuple[str, ErrorSeverity]] = field(default_factory=list)
-    warnings: List[str] = field(default_factory=list)
+    # 成功路径（无错误/警告）不分配列表，消费方需自行判空
+    errors: Optional[List[ErrorEntry]] = field(default=None)
+    warnings: Optional[List[str]] = field(default=None)
     cache_level: CacheLevel = field(default=CacheLevel.FULL_SUCCESS)
 
 # --- 工具函数 ---
 
+@functools.lru_cache(maxsize=1)
 def get_optimal_thread_count() -> int:
-    """获取最优线程数"""
-    cpu_count = os.cpu_count() or 4
+    """获取最优线程数（进程生命周期内不变，结果缓存）"""
+    # 容器/cgroup 限核时 cpu_count() 报告宿主机核数，CPU 亲和掩码才是实际可用数
+    if hasattr(os, 'sched_getaffinity'):
+        try:
+            cpu_count = len(os.sched_getaffinity(0))
+        except OSError:
+            cpu_count = os.cpu_count() or 4
+    else:
+        cpu_count = os.cpu_count() or 4
     return max(1, min(cpu_count - 1, 8))  # 限制最大8线程
 
-def calculate_cache_duration(errors: List[Tuple[str, ErrorSeverity]]) -> int:
+def calculate_cache_duration(errors: List[ErrorEntry]) -> int:
     """根据错误严重程度计算缓存时间"""
     if not errors:
         return 10  # 默认10秒
-    
-    severities = [sev for _, sev in errors]
+
+    severities = [entry[1] for entry in errors]
     if ErrorSeverity.CRITICAL in severities:
         return 2   # 严重错误时缩短缓存
     elif ErrorSeverity.ERROR in severities:
@@ -90,198 +116,325 @@ def calculate_cache_duration(errors: List[Tuple[str, ErrorSeverity]]) -> int:
     else:
         return 8   # 只有警告时稍短缓存
 
+# 预编译的非法路径模式：'..' 同时覆盖 '../' 与 '/..'，单次扫描替代逐个子串检查
+_FORBIDDEN_PATH_RE = re.compile(r'\.\.|[~\0*?|<>"]|//|\\\\')
+
 def safe_disk_path(path: Any) -> bool:
     """检查磁盘路径是否安全"""
     if not isinstance(path, str) or not path or len(path) > 1024:
         return False
-        
-    normalized = path.replace('\\', '/')
-    
-    # 安全检查
-    forbidden = ['..', '~', '\0', '*', '?', '|', '<', '>', '"', '//', '\\\\']
-    if any(pattern in path for pattern in forbidden):
-        return False
-        
-    if '../' in normalized or '/..' in normalized:
+
+    if _FORBIDDEN_PATH_RE.search(path):
         return False
-        
+
     # Windows特定检查
-    if platform.system() == "Windows":
-        if normalized.startswith('//') and '..' in normalized:
-            return False
+    if _IS_WINDOWS:
         if ':' in path and path.index(':') > 1:
             return False
-            
+
     return os.path.isabs(path)
 
+@functools.lru_cache(maxsize=1)
 def is_running_in_container() -> bool:
-    """检测是否运行在容器中"""
+    """检测是否运行在容器中（进程生命周期内结果不变，仅探测一次）"""
     # 容器检测逻辑
     indicators = ['/.dockerenv', '/.dockerinit']
     
     # 检查文件系统指示器
     for indicator in indicators:
-        if os.path.exists(indicator):
+        if os.path.isfile(indicator):
             return True
-            
-    # 检查cgroup
-    if platform.system() != "Windows":
-        try:
-            cgroup_paths = ['/proc/1/cgroup', '/proc/self/cgroup']
-            for cgroup_path in cgroup_paths:
-                if os.path.exists(cgroup_path):
-                    with open(cgroup_path, 'rt', encoding='utf-8') as f:
-                        content = f.read()
-                        if any(keyword in content for keyword in ['docker', 'kubepods', 'containerd', 'lxc']):
-                            return True
-        except (FileNotFoundError, PermissionError, UnicodeDecodeError):
-            pass
+
+    # 检查cgroup：procfs 文件极小，os.open+os.read 一次读满 4KiB 即可，
+    # 省去缓冲文件对象与解码开销
+    if not _IS_WINDOWS:
+        for cgroup_path in ('/proc/1/cgroup', '/proc/self/cgroup'):
+            try:
+                fd = os.open(cgroup_path, os.O_RDONLY)
+                try:
+                    content = os.read(fd, 4096)
+                finally:
+                    os.close(fd)
+            except OSError:
+                continue
+            if any(keyword in content for keyword in (b'docker', b'kubepods', b'containerd', b'lxc')):
+                return True
             
     # 检查环境变量
-    env_keys = os.environ.keys()
-    container_env_vars = ['KUBERNETES_SERVICE_HOST', 'DOCKER_CONTAINER']
-    if any(key in env_keys for key in container_env_vars):
+    if any(key in os.environ for key in ('KUBERNETES_SERVICE_HOST', 'DOCKER_CONTAINER')):
         return True
-        
+
     return False
 
 # --- 核心组件 ---
 
+class MetricsHistory:
+    """采集历史的定长环形缓冲（SoA布局）
+
+    只保留健康统计所需的标量列（CPU/内存百分比与缓存级别编码），
+    不持有完整的 SystemMetrics 对象，稳态运行零分配。
+    """
+
+    __slots__ = ('capacity', 'cpu', 'mem', 'cache_levels', 'head', 'count', 'total')
+
+    def __init__(self, capacity: int = 60):
+        self.capacity = capacity
+        self.cpu = array.array('d', [float('nan')] * capacity)
+        self.mem = array.array('d', [float('nan')] * capacity)
+        self.cache_levels = bytearray(capacity)
+        self.head = 0
+        self.count = 0
+        self.total = 0  # 累计采集次数（不随环形覆盖而减少）
+
+    def push(self, cpu_percent: Optional[float], mem_percent: Optional[float],
+             cache_level: CacheLevel) -> None:
+        i = self.head
+        self.cpu[i] = cpu_percent if cpu_percent is not None else float('nan')
+        self.mem[i] = mem_percent if mem_percent is not None else float('nan')
+        self.cache_levels[i] = cache_level.value
+        self.head = (i + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+        self.total += 1
+
+    def success_rate(self) -> float:
+        """窗口内非 FAILED 采集的占比；无样本时视为 1.0"""
+        if not self.count:
+            return 1.0
+        failed = CacheLevel.FAILED.value
+        window = self.cache_levels if self.count == self.capacity else self.cache_levels[:self.count]
+        ok = self.count - window.count(failed)
+        return ok / self.count
+
 class MetricsCollector:
-    """系统指标采集器 - 支持并行采集和智能重试"""
-    
+    """系统指标采集器 - 支持并行采集和分级容错"""
+
     MAX_DISK_COUNT = 20  # 增加最大磁盘数量
     CPU_TEMP_KEYS = ['coretemp', 'k10temp', 'cpu_thermal', 'acpitz', 'zenpower']
-    IGNORED_FS_TYPES = {'nfs', 'nfs4', 'smbfs', 'cifs', 'tmpfs', 'devtmpfs', 'proc', 'sysfs'}
-    MAX_RETRY_ATTEMPTS = 2
-    RETRY_DELAY = 0.1  # 100ms重试延迟
+    IGNORED_FS_TYPES = frozenset({'nfs', 'nfs4', 'smbfs', 'cifs', 'tmpfs', 'devtmpfs', 'proc', 'sysfs'})
+    DISK_DISCOVERY_TTL = 300  # 自动发现的分区列表缓存时间（秒）
+    TEMP_CACHE_SECONDS = 30   # 温度读数缓存时间（秒）
+    TEMP_FAILURE_COOLDOWN = 60  # 温度读取失败后的冷却时间（秒）
 
     def __init__(self, disk_config: List[Dict[str, str]], show_temp: bool):
         self.disk_config = disk_config
         self.show_temp = show_temp
-        self.boot_time, self.is_container_uptime = self._get_boot_time()
-        self.optimal_threads = get_optimal_thread_count()
-        self.executor = ThreadPoolExecutor(max_workers=self.optimal_threads)
-        self._historical_metrics: Deque[SystemMetrics] = deque(maxlen=60)  # 保存最近60次采集
-
-    def _get_boot_time(self) -> Tuple[Optional[datetime.datetime], bool]:
-        """获取启动时间"""
+        self.boot_time_ts, self.is_container_uptime = self._get_boot_time()
+        # 锚定单调时钟到墙钟：采集时只读 monotonic，不受 NTP 跳变影响
+        self._monotonic_anchor = time.time() - time.monotonic()
+        # CPU 使用率采用增量采样：自持上一次 cpu_times 快照，不依赖
+        # psutil 模块级的全局状态（其他调用方无法干扰我们的基线）
+        try:
+            self._prev_cpu_times = psutil.cpu_times()
+        except Exception:
+            self._prev_cpu_times = None
+        self._history = MetricsHistory(60)  # 最近60次采集的标量历史（环形缓冲）
+        # 自动发现结果缓存：挂载表运行期几乎不变，无需每次采集重新枚举
+        self._discovered_paths: Optional[List[Dict[str, Any]]] = None
+        self._discovered_paths_ts: float = 0.0
+        # 温度读数缓存：读取 /sys/class/hwmon 较慢且秒级变化可忽略；失败后进入冷却期
+        self._last_temp_value: Optional[float] = None
+        self._last_temp_ts: float = 0.0
+        self._temp_failure_until: float = 0.0
+        # 首次成功读温后记住实际存在的传感器键，后续只查这些键
+        self._active_temp_keys: Optional[Tuple[str, ...]] = None
+
+    def _get_boot_time(self) -> Tuple[Optional[float], bool]:
+        """获取启动时间（UNIX时间戳）"""
         try:
             if is_running_in_container():
-                proc_one_creation = psutil.Process(1).create_time()
-                return datetime.datetime.fromtimestamp(proc_one_creation), True
+                proc_one = psutil.Process(1)
+                # oneshot() 合并对 /proc/1 的多次读取为一次
+                with proc_one.oneshot():
+                    proc_one_creation = proc_one.create_time()
+                return proc_one_creation, True
         except (psutil.Error, FileNotFoundError, PermissionError):
             pass
-            
+
         try:
-            return datetime.datetime.fromtimestamp(psutil.boot_time()), False
+            return psutil.boot_time(), False
         except Exception as e:
             logger.error("Failed to get boot time: %s", e)
             return None, False
 
+    def get_health_status(self) -> Dict[str, Any]:
+        """获取采集器健康状态（基于最近60次采集的环形历史）"""
+        success_rate = self._history.success_rate()
+        return {
+            "status": "healthy" if success_rate > 0.7 else "degraded",
+            "success_rate": success_rate,
+            "total_collections": self._history.total,
+        }
+
     async def collect_metrics(self) -> SystemMetrics:
-        """异步收集系统指标 - 支持智能重试"""
-        for attempt in range(self.MAX_RETRY_ATTEMPTS + 1):
-            try:
-                metrics = await asyncio.get_event_loop().run_in_executor(
-                    self.executor, self._collect_sync
-                )
-                self._historical_metrics.append(metrics)
-                return metrics
-            except Exception as e:
-                if attempt == self.MAX_RETRY_ATTEMPTS:
-                    logger.error("Metrics collection failed after %d attempts: %s", 
-                                self.MAX_RETRY_ATTEMPTS + 1, e)
-                    error_metrics = SystemMetrics(
-                        cpu_percent=None, cpu_temp=None, mem_total=None, mem_used=None,
-                        mem_percent=None, net_sent=None, net_recv=None, uptime=None,
-                        is_container_uptime=False, disks=[], 
-                        errors=[(f"Collection failed after {self.MAX_RETRY_ATTEMPTS + 1} attempts: {str(e)}", 
-                                ErrorSeverity.CRITICAL)],
-                        cache_level=CacheLevel.FAILED
-                    )
-                    self._historical_metrics.append(error_metrics)
-                    return error_metrics
-                
-                logger.warning("Metrics collection attempt %d failed, retrying...: %s", 
-                              attempt + 1, e)
-                await asyncio.sleep(self.RETRY_DELAY * (attempt + 1))
+        """异步收集系统指标
+
+        容错在子系统粒度完成（_collect_once 内各探测独立捕获异常，
+        cache_level 反映实际成功范围），因此无需整体重试；这里只兜底
+        聚合逻辑自身的意外异常。
+        """
+        try:
+            metrics = await self._collect_once()
+        except Exception as e:
+            logger.error("Metrics collection failed: %s", e)
+            metrics = SystemMetrics(
+                cpu_percent=None, cpu_temp=None, mem_total=None, mem_used=None,
+                mem_percent=None, net_sent=None, net_recv=None, uptime=None,
+                is_container_uptime=False, disks=[],
+                errors=[(f"Collection failed: {str(e)}",
+                        ErrorSeverity.CRITICAL, ErrorCategory.GENERAL)],
+                cache_level=CacheLevel.FAILED
+            )
+        self._history.push(metrics.cpu_percent, metrics.mem_percent, metrics.cache_level)
+        return metrics
 
-    def _collect_sync(self) -> SystemMetrics:
-        """同步收集系统指标 - 支持并行采集"""
-        errors: List[Tuple[str, ErrorSeverity]] = []
+    async def _collect_once(self) -> SystemMetrics:
+        """异步并行收集系统指标：各独立探测同时下发，总耗时取决于最慢一项"""
+        errors: List[ErrorEntry] = []
         warnings = []
+
+        # 内存/网络读数只是一次内核快照（微秒级），内联执行即可，
+        # 不值得为它们各派发一个线程；采集失败按原有粒度记入 errors
+        mem_data = net_data = None
+        try:
+            mem_data = self._collect_memory_metrics()
+        except Exception:
+            errors.append(("Memory采集失败", ErrorSeverity.ERROR, ErrorCategory.MEMORY))
+        try:
+            net_data = self._collect_network_metrics()
+        except Exception:
+            errors.append(("Network采集失败", ErrorSeverity.ERROR, ErrorCategory.NETWORK))
+
+        # 会触碰文件系统的慢探测（sysfs 温度、/proc 枚举、磁盘统计）
+        # 才下发到线程并行执行，互相重叠等待
+        cpu_result, system_result, disks_result = await asyncio.gather(
+            asyncio.to_thread(self._collect_cpu_metrics),
+            asyncio.to_thread(self._collect_system_metrics),
+            self._get_disk_usages_parallel(errors),
+            return_exceptions=True
+        )
+
+        if isinstance(cpu_result, BaseException):
+            logger.warning("Failed to collect cpu metrics: %s", cpu_result)
+            errors.append(("Cpu采集失败", ErrorSeverity.ERROR, ErrorCategory.CPU))
+            cpu_p = cpu_t = None
+        else:
+            cpu_p, cpu_t = cpu_result
+        if isinstance(system_result, BaseException):
+            logger.warning("Failed to collect system metrics: %s", system_result)
+            errors.append(("System采集失败", ErrorSeverity.ERROR, ErrorCategory.SYSTEM))
+            process_count = load_avg = None
+        else:
+            process_count, load_avg = system_result
+
+        if isinstance(disks_result, BaseException):
+            logger.warning("Failed to collect disk metrics: %s", disks_result)
+            errors.append(("磁盘采集失败", ErrorSeverity.ERROR, ErrorCategory.DISK))
+            disks = None
+        else:
+            disks = disks_result
         
-        # 并行采集基础指标
-        with ThreadPoolExecutor(max_workers=min(4, self.optimal_threads)) as executor:
-            futures = {
-                executor.submit(self._collect_cpu_metrics): 'cpu',
-                executor.submit(self._collect_memory_metrics): 'memory',
-                executor.submit(self._collect_network_metrics): 'network',
-                executor.submit(self._collect_system_metrics): 'system'
-            }
-            
-            results = {}
-            for future in as_completed(futures):
-                metric_type = futures[future]
-                try:
-                    results[metric_type] = future.result()
-                except Exception as e:
-                    logger.warning("Failed to collect %s metrics: %s", metric_type, e)
-                    errors.append((f"{metric_type.capitalize()}采集失败", ErrorSeverity.ERROR))
-
-        # 合并采集结果
-        cpu_p, cpu_t = results.get('cpu', (None, None))
-        mem_data = results.get('memory')
-        net_data = results.get('network')
-        process_count, load_avg = results.get('system', (None, None))
-
-        # 并行采集磁盘使用情况
-        disks = self._get_disk_usages_parallel(errors)
-        
-        uptime = (datetime.datetime.now() - self.boot_time) if self.boot_time else None
-        
+        if self.boot_time_ts:
+            uptime = self._monotonic_anchor + time.monotonic() - self.boot_time_ts
+        else:
+            uptime = None
+
         # 确定缓存级别
         cache_level = self._determine_cache_level(errors, disks)
-        
+
+        # psutil 返回的是命名元组，采集成功时直接解包，无需 getattr 兜底
+        if mem_data is not None:
+            mem_total, mem_used, mem_percent = mem_data.total, mem_data.used, mem_data.percent
+        else:
+            mem_total = mem_used = mem_percent = None
+        if net_data is not None:
+            net_sent, net_recv = net_data.bytes_sent, net_data.bytes_recv
+        else:
+            net_sent = net_recv = None
+
         return SystemMetrics(
             cpu_percent=cpu_p, cpu_temp=cpu_t,
-            mem_total=getattr(mem_data, 'total', None) if mem_data else None,
-            mem_used=getattr(mem_data, 'used', None) if mem_data else None,
-            mem_percent=getattr(mem_data, 'percent', None) if mem_data else None,
-            net_sent=getattr(net_data, 'bytes_sent', None) if net_data else None,
-            net_recv=getattr(net_data, 'bytes_recv', None) if net_data else None,
+            mem_total=mem_total,
+            mem_used=mem_used,
+            mem_percent=mem_percent,
+            net_sent=net_sent,
+            net_recv=net_recv,
             uptime=uptime, is_container_uptime=self.is_container_uptime,
             disks=disks, process_count=process_count, load_avg=load_avg,
-            errors=errors, warnings=warnings, cache_level=cache_level
+            errors=errors or None, warnings=warnings or None, cache_level=cache_level
         )
 
+    def _sample_cpu_percent(self) -> Optional[float]:
+        """基于 cpu_times 增量计算自上次采集以来的CPU使用率（非阻塞）"""
+        now_times = psutil.cpu_times()
+        prev = self._prev_cpu_times
+        self._prev_cpu_times = now_times
+        if prev is None:
+            return None  # 初始化时未能建立基线，首次无增量可算
+
+        # Linux 上 guest/guest_nice 已计入 user/nice，求和前剔除以免重复计数
+        # （与 psutil 的 _cpu_tot_time 口径一致）
+        total_now = sum(now_times) - getattr(now_times, 'guest', 0) - getattr(now_times, 'guest_nice', 0)
+        total_prev = sum(prev) - getattr(prev, 'guest', 0) - getattr(prev, 'guest_nice', 0)
+        total_delta = total_now - total_prev
+        if total_delta <= 0:
+            return 0.0
+        idle_delta = now_times.idle - prev.idle
+        if hasattr(now_times, 'iowait'):
+            idle_delta += now_times.iowait - prev.iowait  # iowait 不算忙碌时间
+        pct = 100.0 * (1.0 - idle_delta / total_delta)
+        return min(max(pct, 0.0), 100.0)
+
     def _collect_cpu_metrics(self) -> Tuple[Optional[float], Optional[float]]:
         """采集CPU指标"""
         try:
-            cpu_p = psutil.cpu_percent(interval=0.5)  # 缩短采样间隔
+            cpu_p = self._sample_cpu_percent()
             cpu_t = None
-            
+
             if self.show_temp and hasattr(psutil, "sensors_temperatures"):
-                try:
-                    temps = psutil.sensors_temperatures()
-                    valid_temps = []
-                    for key in self.CPU_TEMP_KEYS:
-                        if key in temps and temps[key]:
-                            valid_temps.extend([
-                                t.current for t in temps[key] 
-                                if t.current is not None and 0 <= t.current <= 120  # 合理温度范围
-                            ])
-                    if valid_temps:
-                        cpu_t = statistics.mean(valid_temps)
-                except Exception:
-                    pass  # 温度采集失败不影响主要功能
-                    
+                cpu_t = self._read_cpu_temp()
+
             return cpu_p, cpu_t
         except Exception as e:
             logger.warning("CPU metrics collection failed: %s", e)
             raise
 
+    def _read_cpu_temp(self) -> Optional[float]:
+        """读取CPU平均温度，带TTL缓存和失败冷却；失败时保留上次良好读数"""
+        now = time.monotonic()
+        if now < self._temp_failure_until:
+            return self._last_temp_value
+        if (self._last_temp_value is not None and
+                now - self._last_temp_ts < self.TEMP_CACHE_SECONDS):
+            return self._last_temp_value
+
+        try:
+            temps = psutil.sensors_temperatures()
+            # 单遍累加求均值，不物化中间列表
+            total = 0.0
+            count = 0
+            hit_keys = []
+            for key in self._active_temp_keys or self.CPU_TEMP_KEYS:
+                readings = temps.get(key)
+                if not readings:
+                    continue
+                hit_keys.append(key)
+                for t in readings:
+                    current = t.current
+                    if current is not None and 0 <= current <= 120:  # 合理温度范围
+                        total += current
+                        count += 1
+            if count:
+                self._last_temp_value = total / count
+                self._last_temp_ts = now
+                if self._active_temp_keys is None:
+                    self._active_temp_keys = tuple(hit_keys)
+        except Exception:
+            # 温度采集失败不影响主要功能，冷却期内不再重试
+            self._temp_failure_until = now + self.TEMP_FAILURE_COOLDOWN
+
+        return self._last_temp_value
+
     def _collect_memory_metrics(self):
         """采集内存指标"""
         try:
@@ -316,19 +469,19 @@ class MetricsCollector:
             logger.warning("System metrics collection failed: %s", e)
             raise
 
-    def _determine_cache_level(self, errors: List[Tuple[str, ErrorSeverity]], 
+    def _determine_cache_level(self, errors: List[ErrorEntry],
                               disks: Optional[List[DiskUsage]]) -> CacheLevel:
         """确定缓存级别"""
         if not errors:
             return CacheLevel.FULL_SUCCESS
-            
-        error_severities = [sev for _, sev in errors]
-        
+
+        error_severities = [entry[1] for entry in errors]
+
         if ErrorSeverity.CRITICAL in error_severities:
             return CacheLevel.FAILED
-            
-        # 检查是否只有非关键磁盘错误
-        disk_errors = any('Disk' in msg for msg, _ in errors)
+
+        # 按类别判断是否存在磁盘错误（消息文本仅面向用户，不参与逻辑）
+        disk_errors = any(entry[2] is ErrorCategory.DISK for entry in errors)
         if disk_errors and disks:
             # 如果有关键磁盘正常，则视为部分成功
             critical_disks_ok = any(d.is_critical for d in disks)
@@ -337,63 +490,65 @@ class MetricsCollector:
                 
         return CacheLevel.FAILED if ErrorSeverity.ERROR in error_severities else CacheLevel.PARTIAL_SUCCESS
 
-    def _get_disk_usages_parallel(self, errors: List[Tuple[str, ErrorSeverity]]) -> Optional[List[DiskUsage]]:
-        """并行获取磁盘使用情况"""
-        paths_to_check = self._get_disk_paths_to_check(errors)
+    async def _get_disk_usages_parallel(self, errors: List[ErrorEntry]) -> Optional[List[DiskUsage]]:
+        """并行获取磁盘使用情况（复用 asyncio 共享线程池，不再每次新建）"""
+        paths_to_check = await asyncio.to_thread(self._get_disk_paths_to_check, errors)
         if not paths_to_check:
             return None
 
+        results = await asyncio.gather(
+            *[asyncio.to_thread(self._get_single_disk_usage, cfg) for cfg in paths_to_check],
+            return_exceptions=True
+        )
+
         disks = []
         disk_errors = []
-        
-        # 并行采集磁盘数据
-        with ThreadPoolExecutor(max_workers=min(8, self.optimal_threads * 2)) as executor:
-            future_to_disk = {
-                executor.submit(self._get_single_disk_usage, cfg): cfg 
-                for cfg in paths_to_check
-            }
-            
-            for future in as_completed(future_to_disk):
-                cfg = future_to_disk[future]
-                path, display_path = cfg.get('path'), cfg.get('display')
-                
-                try:
-                    disk_usage = future.result()
-                    if disk_usage:
-                        disks.append(disk_usage)
-                except Exception as e:
-                    error_msg = f"磁盘'{display_path or path}'采集失败"
-                    disk_errors.append((error_msg, ErrorSeverity.WARNING))
-                    logger.warning("Failed to get disk usage for '%s': %s", path, e)
+        for cfg, result in zip(paths_to_check, results):
+            path, display_path = cfg.get('path'), cfg.get('display')
+            if isinstance(result, BaseException):
+                disk_errors.append((f"磁盘'{display_path or path}'采集失败",
+                                    ErrorSeverity.WARNING, ErrorCategory.DISK))
+                logger.warning("Failed to get disk usage for '%s': %s", path, result)
+            elif result:
+                disks.append(result)
 
         # 添加磁盘错误到总错误列表
         errors.extend(disk_errors)
-        
+
         return disks
 
-    def _get_disk_paths_to_check(self, errors: List[Tuple[str, ErrorSeverity]]) -> List[Dict[str, str]]:
+    def _get_disk_paths_to_check(self, errors: List[ErrorEntry]) -> List[Dict[str, str]]:
         """获取需要检查的磁盘路径"""
-        paths_to_check = self.disk_config.copy()
+        # 配置列表在此只读，直接返回引用即可，无需每次采集复制
+        if self.disk_config:
+            return self.disk_config
+
+        now = time.monotonic()
+        if (self._discovered_paths is not None and
+                now - self._discovered_paths_ts < self.DISK_DISCOVERY_TTL):
+            return self._discovered_paths
+
+        try:
+            all_parts = psutil.disk_partitions(all=False)
+            discovered_paths = []
+            for part in all_parts:
+                fs = part.fstype
+                if fs and fs.lower() in self.IGNORED_FS_TYPES:
+                    continue
+                if safe_disk_path(part.mountpoint):
+                    discovered_paths.append({
+                        'path': part.mountpoint,
+                        'display': part.mountpoint,
+                        'is_critical': part.mountpoint in ['/', '/var', '/home']  # 标记关键路径
+                    })
+            paths_to_check = discovered_paths[:self.MAX_DISK_COUNT]
+            self._discovered_paths = paths_to_check
+            self._discovered_paths_ts = now
+        except Exception as e:
+            errors.append(("磁盘自动发现失败", ErrorSeverity.ERROR, ErrorCategory.DISK))
+            logger.error("Disk auto-discovery failed: %s", e)
+            return []
 
-        if not paths_to_check:
-            try:
-                all_parts = psutil.disk_partitions(all=False)
-                discovered_paths = []
-                for part in all_parts:
-                    if part.fstype.lower() in self.IGNORED_FS_TYPES:
-                        continue
-                    if safe_disk_path(part.mountpoint):
-                        discovered_paths.append({
-                            'path': part.mountpoint, 
-                            'display': part.mountpoint,
-                            'is_critical': part.mountpoint in ['/', '/var', '/home']  # 标记关键路径
-                        })
-                paths_to_check = discovered_paths[:self.MAX_DISK_COUNT]
-            except Exception as e:
-                errors.append(("磁盘自动发现失败", ErrorSeverity.ERROR))
-                logger.error("Disk auto-discovery failed: %s", e)
-                return []
-        
         return paths_to_check
 
     def _get_single_disk_usage(self, cfg: Dict[str, Any]) -> Optional[DiskUsage]:
@@ -405,13 +560,26 @@ class MetricsCollector:
             return None
 
         try:
-            usage = psutil.disk_usage(path)
+            if _HAS_STATVFS:
+                # 与 psutil.disk_usage 同一 statvfs 系统调用，少一层 Python 包装；
+                # percent 的口径与 psutil 保持一致（对非特权用户可用空间计算）
+                st = os.statvfs(path)
+                frsize = st.f_frsize
+                total = st.f_blocks * frsize
+                avail = st.f_bavail * frsize
+                used = total - st.f_bfree * frsize
+                pct_base = used + avail
+                percent = round(used * 100 / pct_base, 1) if pct_base else 0.0
+                free = avail
+            else:
+                usage = psutil.disk_usage(path)
+                total, used, free, percent = usage.total, usage.used, usage.free, usage.percent
             return DiskUsage(
                 display_path=display_path,
-                total=usage.total,
-                used=usage.used,
-                free=usage.free,
-                percent=usage.percent,
+                total=total,
+                used=used,
+                free=free,
+                percent=percent,
                 is_critical=is_critical
             )
         except Exception as e:
@@ -419,105 +587,156 @@ class MetricsCollector:
             raise
 
     def close(self):
-        """关闭采集器"""
-        self.executor.shutdown(wait=False)
+        """关闭采集器（采集已改用共享的 asyncio 线程池，无常驻资源需要释放）"""
+        pass
 
 class MetricsFormatter:
     """系统指标格式化器"""
     
-    BYTE_LABELS = {0: 'B', 1: 'KB', 2: 'MB', 3: 'GB', 4: 'TB'}
+    BYTE_LABELS = ('B', 'KB', 'MB', 'GB', 'TB')
     SEPARATOR = "─" * 40
+    _SEP_NL = SEPARATOR + "\n"
     EMOJI_MAP = {'cpu': '🖥️', 'memory': '💾', 'disk': '💿', 'network': '🌐'}
+    # 磁盘行模板只解析一次，循环内复用绑定的 format 方法
+    _DISK_FULL_TMPL = "{emoji} **磁盘 ({path})**\n   - 使用率: {pct:.1f}%\n   - 已使用: {used} / {total}"
+    _DISK_MIN_TMPL = "   - {emoji} **磁盘 ({path})**: {pct:.1f}%"
 
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Dict[str, Any], is_containerized: bool = False):
         self.config = config
-        
-    def format(self, metrics: SystemMetrics, is_containerized: bool, privacy_level: str) -> str:
-        """格式化系统指标"""
-        parts = ["💻 **服务器实时状态**"]
-        
+        # 静态头部在初始化时构建一次，避免每次格式化重复拼接
+        self._static_header: List[str] = ["💻 **服务器实时状态**"]
         if is_containerized:
-            parts.append("⚠️ **在容器中运行, 指标可能仅反映容器限制。**")
-
-        if privacy_level == 'minimal':
-            parts.extend([
-                self.SEPARATOR,
-                self._format_cpu(metrics),
-                self._format_memory(metrics),
-            ])
-            if metrics.disks:
-                parts.append(self._format_disks(metrics.disks, minimal_view=True))
-        else:
-            parts.extend([
-                self.SEPARATOR,
-                self._format_uptime(metrics),
-                self._format_cpu(metrics),
-                self._format_memory(metrics),
-                self._format_disks(metrics.disks or [], minimal_view=False),
-                self._format_network(metrics),
-            ])
-
+            self._static_header.append("⚠️ **在容器中运行, 指标可能仅反映容器限制。**")
+        # 各分节的静态前缀只拼接一次，format() 中仅插入动态数值
+        sep_nl = self.SEPARATOR + "\n"
+        self._cpu_prefix = f"{sep_nl}{self.EMOJI_MAP['cpu']} **CPU**"
+        self._mem_prefix = f"{sep_nl}{self.EMOJI_MAP['memory']} **内存**\n   - 使用率: "
+        self._net_prefix = f"{sep_nl}{self.EMOJI_MAP['network']} **网络I/O (自进程启动后总计)**\n   - 总上传: "
+        # 隐私级别在配置后不再变化，初始化时直接绑定对应的渲染路径
+        privacy_level = str(config.get('privacy_level', 'full')).lower()
+        self._render = self._format_minimal if privacy_level == 'minimal' else self._format_full
+        # 磁盘分节按内容失效：磁盘读数近乎静态，数值未变时直接复用上次渲染结果
+        self._disk_section_cache: Optional[Tuple[Any, str]] = None
+        # 每路径的静态片段缓存：转义标签与格式化容量只在容量变化时重算
+        self._disk_label_cache: Dict[str, Tuple[Optional[int], str, str]] = {}
+
+    def format(self, metrics: SystemMetrics) -> str:
+        """格式化系统指标（隐私级别对应的渲染路径在初始化时已绑定）"""
+        return self._render(metrics)
+
+    def _format_minimal(self, metrics: SystemMetrics) -> str:
+        # 各分节直接向同一列表逐行追加，整个渲染只在最后 join 一次
+        parts = list(self._static_header)
+        parts.append(self.SEPARATOR)
+        self._emit_cpu(parts, metrics)
+        self._emit_memory(parts, metrics)
+        if metrics.disks:
+            parts.append(self._format_disks(metrics.disks, minimal_view=True))
+        self._append_errors(parts, metrics)
+        return "\n".join(parts)
+
+    def _format_full(self, metrics: SystemMetrics) -> str:
+        parts = list(self._static_header)
+        parts.append(self.SEPARATOR)
+        self._emit_uptime(parts, metrics)
+        self._emit_cpu(parts, metrics)
+        self._emit_memory(parts, metrics)
+        if metrics.disks:
+            parts.append(self._format_disks(metrics.disks, minimal_view=False))
+        self._emit_network(parts, metrics)
+        self._append_errors(parts, metrics)
+        return "\n".join(parts)
+
+    def _append_errors(self, parts: List[str], metrics: SystemMetrics) -> None:
         if metrics.errors:
-            parts.append(f"{self.SEPARATOR}\n⚠️ **注意: 部分指标采集失败 ({', '.join(metrics.errors)})**")
+            msgs = ', '.join(entry[0] for entry in metrics.errors)
+            parts.append(f"{self._SEP_NL}⚠️ **注意: 部分指标采集失败 ({msgs})**")
 
-        return "\n".join(filter(None, parts))
-
-    def _format_uptime(self, m: SystemMetrics) -> str:
+    def _emit_uptime(self, parts: List[str], m: SystemMetrics) -> None:
         uptime_title = "⏱️ **容器运行时间**" if m.is_container_uptime else "⏱️ **系统稳定运行**"
         if m.uptime is None:
-            return f"{uptime_title}: N/A"
-        
-        days, rem = divmod(m.uptime.total_seconds(), 86400)
+            parts.append(f"{uptime_title}: N/A")
+            return
+
+        days, rem = divmod(m.uptime, 86400)
         hours, rem = divmod(rem, 3600)
         minutes, _ = divmod(rem, 60)
-        return f"{uptime_title}: {int(days)}天 {int(hours)}小时 {int(minutes)}分钟"
+        parts.append(f"{uptime_title}: {int(days)}天 {int(hours)}小时 {int(minutes)}分钟")
 
-    def _format_cpu(self, m: SystemMetrics) -> str:
+    def _emit_cpu(self, parts: List[str], m: SystemMetrics) -> None:
         cpu_usage = f"{m.cpu_percent:.1f}%" if m.cpu_percent is not None else "N/A"
-        temp_str = f" (温度: {m.cpu_temp:.1f}°C)" if m.cpu_temp is not None else ""
-        return f"{self.SEPARATOR}\n{self.EMOJI_MAP['cpu']} **CPU**{temp_str}\n   - 使用率: {cpu_usage}"
+        if m.cpu_temp is not None:
+            parts.append(f"{self._cpu_prefix} (温度: {m.cpu_temp:.1f}°C)")
+        else:
+            parts.append(self._cpu_prefix)
+        parts.append(f"   - 使用率: {cpu_usage}")
 
-    def _format_memory(self, m: SystemMetrics) -> str:
+    def _emit_memory(self, parts: List[str], m: SystemMetrics) -> None:
         mem_percent = f"{m.mem_percent:.1f}%" if m.mem_percent is not None else "N/A"
-        used_mem = self._format_bytes(m.mem_used)
-        total_mem = self._format_bytes(m.mem_total)
-        return (f"{self.SEPARATOR}\n{self.EMOJI_MAP['memory']} **内存**\n   - 使用率: {mem_percent}\n"
-                f"   - 已使用: {used_mem} / {total_mem}")
+        parts.append(f"{self._mem_prefix}{mem_percent}")
+        parts.append(f"   - 已使用: {self._format_bytes(m.mem_used)} / {self._format_bytes(m.mem_total)}")
 
     def _format_disks(self, disks: List[DiskUsage], minimal_view: bool) -> str:
         if not disks:
             return ""
+        # DiskUsage 为 frozen dataclass，内容签名即值元组；未变化时按签名命中缓存
+        key = (minimal_view, tuple(disks))
+        cached = self._disk_section_cache
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        # 将属性/字典查找提升到循环外，磁盘较多时减少重复分派
+        disk_emoji = self.EMOJI_MAP['disk']
+        fmt_bytes = self._format_bytes
         if minimal_view:
-            disk_parts = [f"   - {self.EMOJI_MAP['disk']} **磁盘 ({self._escape_path(d.display_path)})**: {d.percent:.1f}%" for d in disks]
-            return f"{self.SEPARATOR}\n" + "\n".join(disk_parts)
-
-        disk_parts = [
-            f"{self.EMOJI_MAP['disk']} **磁盘 ({self._escape_path(d.display_path)})**\n   - 使用率: {d.percent:.1f}%\n   - 已使用: {self._format_bytes(d.used)} / {self._format_bytes(d.total)}"
-            for d in disks
-        ]
-        return f"{self.SEPARATOR}\n" + f"\n{self.SEPARATOR}\n".join(disk_parts)
-
-    def _format_network(self, m: SystemMetrics) -> str:
-        return (f"{self.SEPARATOR}\n{self.EMOJI_MAP['network']} **网络I/O (自进程启动后总计)**\n"
-                f"   - 总上传: {self._format_bytes(m.net_sent)}\n"
-                f"   - 总下载: {self._format_bytes(m.net_recv)}")
+            line = self._DISK_MIN_TMPL.format
+            disk_parts = [line(emoji=disk_emoji, path=self._disk_statics(d)[0], pct=d.percent)
+                          for d in disks]
+            rendered = self._SEP_NL + "\n".join(disk_parts)
+        else:
+            line = self._DISK_FULL_TMPL.format
+            disk_parts = []
+            for d in disks:
+                label, total_str = self._disk_statics(d)
+                disk_parts.append(line(emoji=disk_emoji, path=label, pct=d.percent,
+                                       used=fmt_bytes(d.used), total=total_str))
+            rendered = self._SEP_NL + f"\n{self._SEP_NL}".join(disk_parts)
+
+        self._disk_section_cache = (key, rendered)
+        return rendered
+
+    def _disk_statics(self, d: DiskUsage) -> Tuple[str, str]:
+        """按路径缓存转义标签与格式化总容量，容量变化时才重算"""
+        cached = self._disk_label_cache.get(d.display_path)
+        if cached is not None and cached[0] == d.total:
+            return cached[1], cached[2]
+        label = self._escape_path(d.display_path)
+        total_str = self._format_bytes(d.total)
+        self._disk_label_cache[d.display_path] = (d.total, label, total_str)
+        return label, total_str
+
+    def _emit_network(self, parts: List[str], m: SystemMetrics) -> None:
+        parts.append(f"{self._net_prefix}{self._format_bytes(m.net_sent)}")
+        parts.append(f"   - 总下载: {self._format_bytes(m.net_recv)}")
 
     def _format_bytes(self, byte_count: Optional[Union[int, float]]) -> str:
         if byte_count is None:
             return "N/A"
         byte_count = int(byte_count)
-        power, n = 1024, 0
-        while byte_count >= power and n < len(self.BYTE_LABELS) - 1:
-            byte_count /= power
-            n += 1
-        return f"{byte_count:.2f}{self.BYTE_LABELS[n]}"
-
-    @staticmethod
-    def _escape_path(path: str) -> str:
-        escape_chars = ['`', '*', '_', '{', '}', '[', ']', '(', ')', '#', '+', '-', '.', '!', '|']
-        for char in escape_chars:
-            path = path.replace(char, '')
-        path = path.replace('\n', ' ').replace('\r', ' ').strip()
+        if byte_count <= 0:
+            return f"0.00{self.BYTE_LABELS[0]}"
+        # bit_length 直接定位 1024 的幂次，无需循环除法
+        n = min((byte_count.bit_length() - 1) // 10, len(self.BYTE_LABELS) - 1)
+        return f"{byte_count / (1 << (10 * n)):.2f}{self.BYTE_LABELS[n]}"
+
+    # Markdown敏感字符删除 + 换行转空格，单张转换表一次扫描完成
+    _ESCAPE_TABLE = str.maketrans(
+        {**{c: None for c in '`*_{}[]()#+-.!|'}, '\n': ' ', '\r': ' '}
+    )
+
+    @classmethod
+    def _escape_path(cls, path: str) -> str:
+        path = path.translate(cls._ESCAPE_TABLE).strip()
         if len(path) > 50:
             path = path[:47] + '...'
         return path
@@ -537,11 +756,12 @@ class ServerStatusPlugin(Star):
         super().__init__(context)
         self.context = context
         self.plugin_config = self._validate_and_parse_config(config)
-        self.formatter = MetricsFormatter(self.plugin_config)
-        self._lock = asyncio.Lock()
-        self._cache: Optional[str] = None
-        self._cache_timestamp: float = 0.0
         self.is_containerized = is_running_in_container()
+        self.formatter = MetricsFormatter(self.plugin_config, self.is_containerized)
+        # (时间戳, 文本, 缓存级别) 快照，整体单次赋值发布，读取无需加锁
+        self._cache_snapshot: Optional[Tuple[float, str, CacheLevel]] = None
+        # single-flight：缓存失效时只有首个请求触发采集，其余等待同一个 Future
+        self._inflight: Optional["asyncio.Future[str]"] = None
         
         # 初始化采集器
         try:
@@ -555,8 +775,7 @@ class ServerStatusPlugin(Star):
             self.collector = None
 
         self._startup_time = time.time()
-        self._cache_level: CacheLevel = CacheLevel.FAILED
-        
+
         # 记录启动信息
         self._log_startup_info()
         
@@ -612,73 +831,95 @@ class ServerStatusPlugin(Star):
             yield event.plain_result("❌ 状态插件未正确初始化，请联系管理员检查日志。")
             return
 
-        # 检查缓存（智能缓存策略）
+        # 检查缓存（智能缓存策略）：快照读取无锁，命中路径不排队
         now = time.time()
         cache_duration = self._get_dynamic_cache_duration()
-        
-        async with self._lock:
-            should_use_cache = (
-                cache_duration > 0 and 
-                self._cache and 
-                (now - self._cache_timestamp < cache_duration) and
-                self._cache_level != CacheLevel.FAILED
-            )
-            
-            if should_use_cache:
-                yield event.plain_result(self._cache)
-                return
 
+        snapshot = self._cache_snapshot
+        if self._is_snapshot_fresh(snapshot, now, cache_duration):
+            yield event.plain_result(snapshot[1])
+            return
+
+        # 已有采集在进行时，等待同一结果而不是再触发一次
+        inflight = self._inflight
+        if inflight is not None:
+            yield event.plain_result(await inflight)
+            return
+
+        # 成为本轮刷新的执行者（检查与赋值之间没有 await，协作式调度下不会竞争）
+        future: "asyncio.Future[str]" = asyncio.get_running_loop().create_future()
+        self._inflight = future
+        try:
             # 显示采集状态
-            if self._cache_level == CacheLevel.PARTIAL_SUCCESS:
+            if snapshot is not None and snapshot[2] == CacheLevel.PARTIAL_SUCCESS:
                 yield event.plain_result("🔄 正在更新部分数据，请稍候...")
             else:
                 yield event.plain_result("🔄 正在重新获取服务器状态，请稍候...")
 
             try:
-                # 采集指标
-                timeout = self.plugin_config['collect_timeout']
-                metrics = await asyncio.wait_for(
-                    self.collector.collect_metrics(), 
-                    timeout=timeout
-                )
-                
-                # 格式化输出
-                text_message = self.formatter.format(
-                    metrics, 
-                    self.is_containerized, 
-                    self.plugin_config['privacy_level']
-                )
-                
-                # 智能缓存策略
-                cacheable = metrics.cache_level in [CacheLevel.FULL_SUCCESS, CacheLevel.PARTIAL_SUCCESS]
-                if cacheable:
-                    self._cache = text_message
-                    self._cache_timestamp = now
-                    self._cache_level = metrics.cache_level
-                    logger.info("Cache updated with level: %s", metrics.cache_level.name)
-                
-                yield event.plain_result(text_message)
-
-            except asyncio.TimeoutError:
-                error_msg = f"⏰ 数据采集超时 ({timeout}s)，请稍后重试或联系管理员。"
-                logger.error("Data collection timed out")
-                # 超时时尝试使用旧缓存（如果可用）
-                if self._cache and self._cache_level != CacheLevel.FAILED:
-                    yield event.plain_result(f"""⚠️ 采集超时，使用缓存数据:
-
-{self._cache}""")
-                else:
-                    yield event.plain_result(error_msg)
+                reply = await self._refresh_status(now, snapshot)
             except Exception as e:
-                error_msg = f"❌ 处理状态请求时出现错误: {str(e)}"
-                logger.error("Status handling error: %s", e)
-                # 错误时尝试使用旧缓存
-                if self._cache and self._cache_level != CacheLevel.FAILED:
-                    yield event.plain_result(f"""⚠️ 采集错误，使用缓存数据:
-
-{self._cache}""")
-                else:
-                    yield event.plain_result(error_msg)
+                # _refresh_status 自行兜底，此处仅防御性保证等待者不会挂起
+                reply = f"❌ 处理状态请求时出现错误: {str(e)}"
+            future.set_result(reply)
+        finally:
+            # 生成器被关闭(GeneratorExit)或任务被取消时也必须收尾：
+            # 未完成的 future 以取消结束，等待者立即出错而不是永久悬挂，
+            # 下一个请求会重新发起采集
+            self._inflight = None
+            if not future.done():
+                future.cancel()
+
+        yield event.plain_result(reply)
+
+    async def _refresh_status(self, now: float,
+                              snapshot: Optional[Tuple[float, str, CacheLevel]]) -> str:
+        """执行一次采集并返回应答文本；失败时回退到旧快照或错误提示"""
+        timeout = self.plugin_config['collect_timeout']
+        try:
+            metrics = await asyncio.wait_for(
+                self.collector.collect_metrics(),
+                timeout=timeout
+            )
+
+            # 格式化输出
+            text_message = self.formatter.format(metrics)
+
+            # 智能缓存策略：整体快照单次赋值发布
+            cacheable = metrics.cache_level in [CacheLevel.FULL_SUCCESS, CacheLevel.PARTIAL_SUCCESS]
+            if cacheable:
+                self._cache_snapshot = (now, text_message, metrics.cache_level)
+                logger.info("Cache updated with level: %s", metrics.cache_level.name)
+
+            return text_message
+
+        except asyncio.TimeoutError:
+            logger.error("Data collection timed out")
+            # 超时时尝试使用旧缓存（如果可用）
+            if snapshot is not None and snapshot[2] != CacheLevel.FAILED:
+                return f"""⚠️ 采集超时，使用缓存数据:
+
+{snapshot[1]}"""
+            return f"⏰ 数据采集超时 ({timeout}s)，请稍后重试或联系管理员。"
+        except Exception as e:
+            logger.error("Status handling error: %s", e)
+            # 错误时尝试使用旧缓存
+            if snapshot is not None and snapshot[2] != CacheLevel.FAILED:
+                return f"""⚠️ 采集错误，使用缓存数据:
+
+{snapshot[1]}"""
+            return f"❌ 处理状态请求时出现错误: {str(e)}"
+
+    @staticmethod
+    def _is_snapshot_fresh(snapshot: Optional[Tuple[float, str, CacheLevel]],
+                           now: float, cache_duration: int) -> bool:
+        """判断缓存快照是否仍然有效"""
+        return (
+            cache_duration > 0 and
+            snapshot is not None and
+            (now - snapshot[0] < cache_duration) and
+            snapshot[2] != CacheLevel.FAILED
+        )
 
     def _get_dynamic_cache_duration(self) -> int:
         """获取动态缓存时间"""